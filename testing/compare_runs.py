@@ -0,0 +1,282 @@
+import argparse
+import json
+import sys
+import traceback
+import numpy as np
+import pandas as pd
+
+# Upper bound on resampled values held in memory at once (bootstrap batches x utterances)
+BOOTSTRAP_BATCH_ELEMENTS = 4_000_000
+
+# Exit codes: 1 is reserved for a detected regression so CI can tell it apart from a broken comparison
+EXIT_REGRESSION = 1
+EXIT_ERROR = 2
+
+
+def load_evaluated(json_path: str) -> tuple:
+    """
+    Returns (evaluation DataFrame, summary dict) of an evaluated run.
+    Utterances with a reference but no transcript (failed, skipped or crashed clips) are
+    marked as failed and scored as WER 1.0, so a broken model cannot look accurate.
+    Raises ValueError when the file is not an evaluated run.
+    """
+    with open(json_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    if isinstance(data, list):
+        # Older evaluated files: a plain list with the summary appended last
+        summary = data.pop() if data and isinstance(data[-1], dict) and "average_WER" in data[-1] else {}
+        evaluation = data
+    elif isinstance(data, dict):
+        summary = data.get("summary", {})
+        evaluation = data.get("evaluation", [])
+    else:
+        raise ValueError(f"{json_path} is not an evaluated run.")
+
+    if not evaluation:
+        raise ValueError(f"{json_path} contains no evaluated utterances.")
+    if not all(isinstance(entry, dict) and entry.get("file_name") for entry in evaluation):
+        raise ValueError(f"{json_path} has evaluation entries without a file_name.")
+
+    df = pd.DataFrame(evaluation)
+    for column in ("WER", "inference_time", "duration", "sentence", "transcript"):
+        if column not in df:
+            df[column] = None
+    df = df[["file_name", "WER", "inference_time", "duration", "sentence", "transcript"]].drop_duplicates("file_name")
+    df["WER"] = pd.to_numeric(df["WER"], errors="coerce")
+    df["inference_time"] = pd.to_numeric(df["inference_time"], errors="coerce")
+    df["duration"] = pd.to_numeric(df["duration"], errors="coerce")
+    df["has_reference"] = df["sentence"].notna()
+    df["failed"] = df["has_reference"] & df["transcript"].isna()
+    df.loc[df["failed"], "WER"] = 1.0
+    return df.drop(columns=["sentence", "transcript"]), summary
+
+
+def load_durations(manifest_path: str) -> pd.Series:
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        entries = json.load(file)["entries"]
+    return pd.Series({entry["path"]: entry["duration"] for entry in entries}, name="manifest_duration")
+
+
+def pair_runs(baseline: pd.DataFrame, candidate: pd.DataFrame, durations: pd.Series = None) -> pd.DataFrame:
+    """
+    Joins the two runs on file name, keeping every baseline utterance.
+    Utterances the candidate lacks are marked missing and, like failures, scored as WER 1.0.
+    """
+    paired = baseline.merge(candidate, on="file_name", how="left", suffixes=("_base", "_cand"), indicator=True)
+    paired["missing"] = paired["_merge"] == "left_only"
+    paired = paired.drop(columns=["_merge"])
+    paired.loc[paired["missing"] & paired["has_reference_base"], "WER_cand"] = 1.0
+    paired["duration"] = paired["duration_base"].fillna(paired["duration_cand"])
+    if durations is not None:
+        paired["duration"] = paired["duration"].fillna(paired["file_name"].map(durations))
+    return paired
+
+
+def bootstrap(statistic, arrays: tuple, n_resamples: int, confidence: float, seed: int) -> tuple:
+    """
+    Paired bootstrap confidence interval of statistic(*resampled_arrays).
+    statistic receives 2D arrays (resamples x utterances) and returns one value per row.
+    """
+    n = len(arrays[0])
+    rng = np.random.default_rng(seed)
+    batch_size = max(1, BOOTSTRAP_BATCH_ELEMENTS // n)
+    values = np.empty(n_resamples)
+    for start in range(0, n_resamples, batch_size):
+        stop = min(start + batch_size, n_resamples)
+        indices = rng.integers(0, n, size=(stop - start, n))
+        values[start:stop] = statistic(*(array[indices] for array in arrays))
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(values, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def compare_wer(paired: pd.DataFrame, n_resamples: int, confidence: float, seed: int) -> dict:
+    """Absolute change of the average per-utterance WER (same definition as evaluation.py)."""
+    valid = paired.dropna(subset=["WER_base", "WER_cand"])
+    if valid.empty:
+        return None
+    base = valid["WER_base"].to_numpy(dtype=np.float64)
+    delta = valid["WER_cand"].to_numpy(dtype=np.float64) - base
+    low, high = bootstrap(lambda d: d.mean(axis=1), (delta,), n_resamples, confidence, seed)
+    return {
+        "utterances": len(valid),
+        "baseline": float(base.mean()),
+        "candidate": float(base.mean() + delta.mean()),
+        "delta": float(delta.mean()),
+        "ci": [low, high],
+    }
+
+
+def compare_speed(paired: pd.DataFrame, n_resamples: int, confidence: float, seed: int) -> dict:
+    """
+    Relative change of the real-time factor (total inference time / total audio duration).
+    Both runs cover the same utterances, so the ratio of total inference times is the RTF ratio.
+    Without durations the same ratio is reported as plain inference time.
+    """
+    valid = paired.dropna(subset=["inference_time_base", "inference_time_cand"])
+    valid = valid[(valid["inference_time_base"] > 0) & (valid["inference_time_cand"] > 0)]
+    if valid.empty:
+        return None
+    base = valid["inference_time_base"].to_numpy(dtype=np.float64)
+    cand = valid["inference_time_cand"].to_numpy(dtype=np.float64)
+    duration = valid["duration"].to_numpy(dtype=np.float64)
+    has_durations = not np.isnan(duration).any() and (duration > 0).all()
+
+    low, high = bootstrap(
+        lambda b, c: c.sum(axis=1) / b.sum(axis=1) - 1, (base, cand), n_resamples, confidence, seed
+    )
+    result = {
+        "metric": "RTF" if has_durations else "inference_time",
+        "utterances": len(valid),
+        "baseline": float(base.sum() / duration.sum()) if has_durations else float(base.mean()),
+        "candidate": float(cand.sum() / duration.sum()) if has_durations else float(cand.mean()),
+        "relative_delta": float(cand.sum() / base.sum() - 1),
+        "ci": [low, high],
+    }
+    return result
+
+
+def compare_failures(paired: pd.DataFrame, candidate_only: int) -> dict:
+    """Share of baseline utterances without a transcript, in each run."""
+    total = len(paired)
+    baseline_failed = int(paired["failed_base"].sum())
+    candidate_failed = int(paired["failed_cand"].fillna(False).astype(bool).sum())
+    candidate_missing = int(paired["missing"].sum())
+    baseline_rate = baseline_failed / total
+    candidate_rate = (candidate_failed + candidate_missing) / total
+    return {
+        "utterances": total,
+        "baseline_failed": baseline_failed,
+        "candidate_failed": candidate_failed,
+        "candidate_missing": candidate_missing,
+        "candidate_only": candidate_only,
+        "baseline_rate": baseline_rate,
+        "candidate_rate": candidate_rate,
+        "increase": candidate_rate - baseline_rate,
+    }
+
+
+def is_regression(delta: float, ci: list, threshold: float) -> bool:
+    """Worse than the threshold and the interval excludes no change."""
+    return delta > threshold and ci[0] > 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare accuracy and speed of two evaluated runs")
+    parser.add_argument("baseline", type=str, help="Evaluated JSON of the baseline run")
+    parser.add_argument("candidate", type=str, help="Evaluated JSON of the candidate run")
+    parser.add_argument("--manifest", type=str, help="Manifest JSON providing durations for the real-time factor")
+    parser.add_argument(
+        "--max-wer-increase", type=float, default=0.005,
+        help="Allowed absolute increase of the average WER (default: 0.005)"
+    )
+    parser.add_argument(
+        "--max-rtf-increase", type=float, default=0.05,
+        help="Allowed relative increase of the real-time factor (default: 0.05 = 5%%)"
+    )
+    parser.add_argument(
+        "--max-failure-increase", type=float, default=0.01,
+        help="Allowed absolute increase of the share of failed or missing utterances (default: 0.01)"
+    )
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap resamples (default: 2000)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level (default: 0.95)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the bootstrap")
+    parser.add_argument("--output", "-o", type=str, help="Save the comparison as JSON")
+    args = parser.parse_args()
+
+    baseline, baseline_summary = load_evaluated(args.baseline)
+    candidate, candidate_summary = load_evaluated(args.candidate)
+    durations = load_durations(args.manifest) if args.manifest else None
+    paired = pair_runs(baseline, candidate, durations)
+    matched = int((~paired["missing"]).sum())
+    candidate_only = len(candidate) - matched
+
+    print(f"Baseline:  {args.baseline} ({baseline_summary.get('model', 'Unknown')}, {len(baseline)} files)")
+    print(f"Candidate: {args.candidate} ({candidate_summary.get('model', 'Unknown')}, {len(candidate)} files)")
+    print(f"Paired utterances: {matched}")
+    if matched == 0:
+        print("Error: the runs have no file names in common.")
+        return EXIT_ERROR
+
+    failure_result = compare_failures(paired, candidate_only)
+    print(
+        f"Failed or missing: baseline {failure_result['baseline_failed']} "
+        f"({failure_result['baseline_rate']:.2%}), candidate {failure_result['candidate_failed']} failed "
+        f"+ {failure_result['candidate_missing']} missing ({failure_result['candidate_rate']:.2%}), "
+        f"{candidate_only} only in candidate (ignored)"
+    )
+
+    wer_result = compare_wer(paired, args.resamples, args.confidence, args.seed)
+    speed_result = compare_speed(paired, args.resamples, args.confidence, args.seed)
+    regressions = []
+
+    failure_result["regression"] = failure_result["increase"] > args.max_failure_increase
+    if failure_result["regression"]:
+        regressions.append(f"failed or missing utterances increased by more than {args.max_failure_increase:.2%}")
+
+    if wer_result is not None:
+        wer_result["regression"] = is_regression(wer_result["delta"], wer_result["ci"], args.max_wer_increase)
+        print(
+            f"\nWER: {wer_result['baseline']:.2%} -> {wer_result['candidate']:.2%} "
+            f"(delta {wer_result['delta']:+.2%}, {args.confidence:.0%} CI "
+            f"[{wer_result['ci'][0]:+.2%}, {wer_result['ci'][1]:+.2%}], {wer_result['utterances']} utterances)"
+        )
+        if wer_result["regression"]:
+            regressions.append(f"WER increased by more than {args.max_wer_increase:.2%}")
+    else:
+        print("\nWER: no utterances with WER in both runs")
+
+    if speed_result is not None:
+        speed_result["regression"] = is_regression(
+            speed_result["relative_delta"], speed_result["ci"], args.max_rtf_increase
+        )
+        unit = "" if speed_result["metric"] == "RTF" else "s"
+        print(
+            f"{speed_result['metric']}: {speed_result['baseline']:.4f}{unit} -> {speed_result['candidate']:.4f}{unit} "
+            f"(change {speed_result['relative_delta']:+.2%}, {args.confidence:.0%} CI "
+            f"[{speed_result['ci'][0]:+.2%}, {speed_result['ci'][1]:+.2%}], {speed_result['utterances']} utterances)"
+        )
+        if speed_result["metric"] != "RTF":
+            print("Note: no durations in the runs, pass --manifest to compare the real-time factor")
+        if speed_result["regression"]:
+            regressions.append(f"{speed_result['metric']} increased by more than {args.max_rtf_increase:.2%}")
+    else:
+        print("Speed: no utterances with inference time in both runs")
+
+    if args.output:
+        report = {
+            "baseline": args.baseline,
+            "candidate": args.candidate,
+            "paired_utterances": matched,
+            "thresholds": {
+                "max_wer_increase": args.max_wer_increase,
+                "max_rtf_increase": args.max_rtf_increase,
+                "max_failure_increase": args.max_failure_increase,
+            },
+            "failures": failure_result,
+            "WER": wer_result,
+            "speed": speed_result,
+            "regressions": regressions,
+        }
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, ensure_ascii=False, indent=4)
+        print(f"\nComparison saved to {args.output}")
+
+    if regressions:
+        print("\nREGRESSION: " + "; ".join(regressions))
+        return EXIT_REGRESSION
+    print("\nNo regression detected.")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        # JSONDecodeError is a ValueError; anything else must not look like a regression either
+        print(f"Error: {e}")
+        sys.exit(EXIT_ERROR)
+    except Exception:
+        traceback.print_exc()
+        sys.exit(EXIT_ERROR)
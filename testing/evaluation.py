@@ -120,6 +120,8 @@ if __name__ == "__main__":
 	model_name = full_data.get("model", "Unknown")
 	parallel_processes = full_data.get("parallel_processes", None)
 	total_time_taken = full_data.get("total_time_taken", None)
+	torch_threads = full_data.get("torch_threads", None)
+	interop_threads = full_data.get("interop_threads", None)
 
 	evaluation = []
 
@@ -128,6 +130,9 @@ if __name__ == "__main__":
 		mp3_file_name = result["file_name"].replace(".wav", ".mp3")
 		additional_info = get_additional_info_for_file(validated_tsv.name, mp3_file_name)
 		evaluated.update(additional_info)
+		for key in ("confidence", "duration"):
+			if key in result:
+				evaluated[key] = result[key]
 		evaluation.append(evaluated)
 
 	# Calculate averages
@@ -142,6 +147,8 @@ if __name__ == "__main__":
 		"summary": {
 			"model": model_name,
 			"parallel_processes": parallel_processes,
+			"torch_threads": torch_threads,
+			"interop_threads": interop_threads,
 			"total_time_taken": total_time_taken,
 			"average_WER": average_wer,
 			"average_CER": average_cer
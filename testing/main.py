@@ -1,23 +1,31 @@
 from models.testing_speech_recognition import SpeechRecognitionModel
 from models.testing_whisper import WhisperModel
 from models.testing_wav2vec import Wav2Vec2Model
+from models.testing_sphinx import SphinxModel
+from manifest import load_manifest, load_references, filter_entries, parse_shard, shard_entries
+from memory_guard import MODEL_MEMORY_MB, get_rss_mb, get_duration, plan_clip
 import json
 import os
 import time
 import argparse
 import sys
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import queue
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 
 try:
     import tkinter as tk
-    from tkinter import filedialog
+    from tkinter import filedialog, ttk
     GUI_AVAILABLE = True
 except ImportError:
     GUI_AVAILABLE = False
 
 
 def save_transcription(
-    output_path: str, file_name: str, transcript: str, elapsed_time: float
+    output_path: str, file_name: str, transcript: str, elapsed_time: float, extra: dict = None
 ):
     """Saves transcription output to a JSON file with a unique serial number."""
     if not os.path.exists(output_path):
@@ -30,6 +38,7 @@ def save_transcription(
             "file_name": file_name,
             "transcript": transcript,
             "time_taken": elapsed_time,
+            **(extra or {}),
         }
         data["results"].append(result_entry)
         json_file.seek(0)
@@ -37,35 +46,129 @@ def save_transcription(
         json_file.truncate()
 
 
-def transcribe_file(model_choice, audio_path, file_name):
+# Models loaded in this process, reused across files so every worker initializes each model once
+_loaded_models = {}
+
+
+def get_model(model_choice: str, model_options: dict = None):
+    """Returns the model for this worker process, creating it on first use."""
+    model_options = model_options or {}
+    cache_key = (model_choice, tuple(sorted(model_options.items())))
+    if cache_key in _loaded_models:
+        return _loaded_models[cache_key]
+
+    if model_choice == "Google":
+        model = SpeechRecognitionModel(model="google")
+    elif model_choice == "Whisper":
+        model = SpeechRecognitionModel(model="whisper")
+    elif model_choice == "Sphinx":
+        model = SphinxModel(
+            lm=model_options.get("sphinx_lm"),
+            dictionary=model_options.get("sphinx_dict"),
+            kws=model_options.get("sphinx_kws"),
+            jsgf=model_options.get("sphinx_jsgf"),
+        )
+    elif model_choice == "Whisper_openai":
+        model = WhisperModel(model_store=model_options.get("model_store"))
+    elif model_choice == "Wav2Vec_large":
+        model = Wav2Vec2Model(
+            model_variant="large",
+            lm_path=model_options.get("lm_path"),
+            beam_width=model_options.get("beam_width"),
+            model_store=model_options.get("model_store"),
+        )
+    elif model_choice == "Wav2Vec_base":
+        model = Wav2Vec2Model(
+            model_variant="base",
+            lm_path=model_options.get("lm_path"),
+            beam_width=model_options.get("beam_width"),
+            model_store=model_options.get("model_store"),
+        )
+    else:
+        raise ValueError("Invalid model choice.")
+
+    _loaded_models[cache_key] = model
+    return model
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / container limits where available)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve_torch_threads(parallel_processes: int, torch_threads: int = None, interop_threads: int = None) -> tuple:
+    """
+    Splits the available cores across the worker processes unless set explicitly.
+    Inter-op parallelism does not help single-clip eager inference, so it defaults to 1.
+    """
+    if torch_threads is None:
+        torch_threads = max(1, available_cores() // parallel_processes)
+    if interop_threads is None:
+        interop_threads = 1
+    return torch_threads, interop_threads
+
+
+def init_worker(torch_threads: int, interop_threads: int):
+    """Runs once in every worker process before it takes any file."""
     try:
-        if model_choice == "Google":
-            model = SpeechRecognitionModel(model="google")
-        elif model_choice == "Whisper":
-            model = SpeechRecognitionModel(model="whisper")
-        elif model_choice == "Sphinx":
-            model = SpeechRecognitionModel(model="sphinx")
-        elif model_choice == "Whisper_openai":
-            model = WhisperModel()
-        elif model_choice == "Wav2Vec_large":
-            model = Wav2Vec2Model(model_variant="large")
-        elif model_choice == "Wav2Vec_base":
-            model = Wav2Vec2Model(model_variant="base")
-        else:
-            raise ValueError("Invalid model choice.")
+        import torch
+    except ImportError:
+        return
+    # Also sets the OpenMP/MKL pools, torch is already loaded so their env vars would have no effect
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(interop_threads)
+    except RuntimeError:
+        # Can only be set before any inter-op work has started in this process,
+        # the value actually in use is reported by applied_torch_threads()
+        pass
+
+
+def applied_torch_threads() -> list:
+    """Returns [intra-op, inter-op] threads in effect in this process, or None without torch."""
+    try:
+        import torch
+    except ImportError:
+        return None
+    return [torch.get_num_threads(), torch.get_num_interop_threads()]
+
+
+def transcribe_file(model_choice, audio_path, file_name, model_options=None, chunk_seconds=None):
+    try:
+        model = get_model(model_choice, model_options)
+
+        word_details = (model_options or {}).get("word_details") and hasattr(model, "transcribe_detailed")
+        details = None
 
         start_time = time.time()
-        transcript = model.transcribe(audio_path)
+        if word_details:
+            # Timings and confidences come from the same forward pass as the transcript
+            details = model.transcribe_detailed(audio_path, chunk_seconds=chunk_seconds)
+            transcript = details["text"] if details is not None else None
+        elif chunk_seconds:
+            transcript = model.transcribe(audio_path, chunk_seconds=chunk_seconds)
+        else:
+            transcript = model.transcribe(audio_path)
         elapsed_time = time.time() - start_time
         
         if transcript is None:
             print(f"Warning: {file_name} returned None transcript (audio might be unclear or model couldn't process it)")
         
-        return {
+        result_entry = {
             "file_name": file_name,
             "transcript": transcript,
             "time_taken": elapsed_time,
+            "worker_rss_mb": get_rss_mb(),
+            "torch_threads": applied_torch_threads(),
         }
+        if chunk_seconds:
+            result_entry["chunk_seconds"] = chunk_seconds
+        if details is not None:
+            result_entry["confidence"] = details["confidence"]
+            result_entry["words"] = details["words"]
+        return result_entry
     except Exception as e:
         print(f"Error processing {file_name}: {e}")
         import traceback
@@ -77,7 +180,22 @@ def transcribe_file(model_choice, audio_path, file_name):
             "error": str(e)
         }
 
-def transcribe(audio_folder: str, model_choice: str, parallel_processes: int = 1):
+def transcribe(
+    audio_folder: str,
+    model_choice: str,
+    parallel_processes: int = 1,
+    progress_callback=None,
+    cancel_event: threading.Event = None,
+    model_options: dict = None,
+    audio_files: list = None,
+    run_info: dict = None,
+    durations: dict = None,
+    max_tasks_per_worker: int = None,
+    max_worker_rss_mb: float = None,
+    max_clip_memory_mb: float = None,
+    torch_threads: int = None,
+    interop_threads: int = None,
+):
     """
     Transcribe audio files from a folder using the specified model.
     
@@ -85,11 +203,37 @@ def transcribe(audio_folder: str, model_choice: str, parallel_processes: int = 1
         audio_folder: Path to folder containing audio files
         model_choice: Model to use (Google, Whisper, Sphinx, Whisper_openai, Wav2Vec_base, Wav2Vec_large)
         parallel_processes: Number of parallel processes to use (default: 1)
+        progress_callback: Optional callable(result_entry, done, total) called after each finished file
+        cancel_event: Optional event; once set, pending files are cancelled and the run stops
+        model_options: Optional model settings, e.g. sphinx_lm, sphinx_dict, sphinx_kws, sphinx_jsgf,
+            word_details, lm_path, beam_width, model_store
+        audio_files: Optional list of file names inside audio_folder, e.g. from a manifest shard
+        run_info: Optional extra fields stored in the output header (manifest, shard, filters)
+        durations: Optional clip durations in seconds by file name, read from the files when missing
+        max_tasks_per_worker: Replace each worker process after this many files
+        max_worker_rss_mb: Replace the worker pool once a worker reports more resident memory than this
+        max_clip_memory_mb: Per-clip memory budget; larger clips are chunked or skipped
+            (defaults to max_worker_rss_mb)
+        torch_threads: Intra-op threads per worker (default: available cores / parallel_processes)
+        interop_threads: Inter-op threads per worker (default: 1)
     """
     if not audio_folder or not os.path.exists(audio_folder):
         print(f"Error: Audio folder '{audio_folder}' does not exist.")
         return
 
+    # Also covers GUI runs, which pass no model options
+    if os.environ.get("ASR_MODEL_STORE") and not (model_options or {}).get("model_store"):
+        model_options = {**(model_options or {}), "model_store": os.environ["ASR_MODEL_STORE"]}
+
+    memory_limit_mb = max_clip_memory_mb or max_worker_rss_mb
+    if memory_limit_mb is not None and memory_limit_mb <= MODEL_MEMORY_MB[model_choice][0]:
+        # Every clip would be skipped, the run would finish without transcribing anything
+        print(
+            f"Error: memory limit {memory_limit_mb:.0f} MB is below the {MODEL_MEMORY_MB[model_choice][0]} MB "
+            f"estimated for loading {model_choice}."
+        )
+        return
+
     output_dir = "testing/output/output.json"
     serial_number = 1
     while os.path.exists(output_dir):
@@ -100,10 +244,22 @@ def transcribe(audio_folder: str, model_choice: str, parallel_processes: int = 1
     print(f"Output will be saved to: {output_dir}")
     print(f"Model: {model_choice}")
     print(f"Parallel processes: {parallel_processes}")
+    torch_threads, interop_threads = resolve_torch_threads(parallel_processes, torch_threads, interop_threads)
+    print(f"Torch threads per process: {torch_threads} (inter-op: {interop_threads})")
+    # [intra-op, inter-op] pairs reported by the workers
+    applied_threads = set()
 
     output = {
         "model": model_choice,
         "parallel_processes": parallel_processes,
+        "available_cores": available_cores(),
+        "requested_torch_threads": torch_threads,
+        "requested_interop_threads": interop_threads,
+        "model_options": model_options or {},
+        "max_tasks_per_worker": max_tasks_per_worker,
+        "max_worker_rss_mb": max_worker_rss_mb,
+        "max_clip_memory_mb": max_clip_memory_mb,
+        **(run_info or {}),
         "results": [],
     }
     with open(output_dir, "w", encoding="utf-8") as json_file:
@@ -111,11 +267,12 @@ def transcribe(audio_folder: str, model_choice: str, parallel_processes: int = 1
 
     total_time_start = time.time()
 
-    audio_files = [
-        file_name
-        for file_name in os.listdir(audio_folder)
-        if file_name.lower().endswith((".wav", ".mp3", ".flac"))
-    ]
+    if audio_files is None:
+        audio_files = [
+            file_name
+            for file_name in os.listdir(audio_folder)
+            if file_name.lower().endswith((".wav", ".mp3", ".flac"))
+        ]
     folder_size = len(audio_files)
     
     if folder_size == 0:
@@ -124,36 +281,176 @@ def transcribe(audio_folder: str, model_choice: str, parallel_processes: int = 1
 
     print(f"Found {folder_size} audio files to process")
 
-    # Use multiprocessing
-    futures = []
-    with ProcessPoolExecutor(max_workers=parallel_processes) as executor:
-        for file_name in audio_files:
-            full_path = os.path.join(audio_folder, file_name)
-            futures.append(
-                executor.submit(transcribe_file, model_choice, full_path, file_name)
-            )
+    durations = dict(durations or {})
+    idx = 0
 
-        for idx, future in enumerate(as_completed(futures), 1):
-            result_entry = future.result()
-            save_transcription(
-                output_dir,
-                result_entry["file_name"],
-                result_entry["transcript"],
-                result_entry["time_taken"],
-            )
-            print(
-                f"({idx}/{folder_size}) {result_entry['file_name']} done in {result_entry['time_taken']:.2f}s"
+    def record(result_entry):
+        nonlocal idx
+        idx += 1
+        threads = result_entry.pop("torch_threads", None)
+        if threads is not None:
+            applied_threads.add(tuple(threads))
+        extra = {
+            key: value
+            for key, value in result_entry.items()
+            if key not in ("file_name", "transcript", "time_taken")
+        }
+        if result_entry["file_name"] in durations:
+            extra["duration"] = durations[result_entry["file_name"]]
+        save_transcription(
+            output_dir,
+            result_entry["file_name"],
+            result_entry["transcript"],
+            result_entry["time_taken"],
+            extra,
+        )
+        print(
+            f"({idx}/{folder_size}) {result_entry['file_name']} done in {result_entry['time_taken']:.2f}s"
+        )
+        if progress_callback is not None:
+            progress_callback(result_entry, idx, folder_size)
+
+    def plan(file_name):
+        """Returns the chunk length for the file, or None; records the file and returns False when it is skipped."""
+        if memory_limit_mb is None:
+            return None
+        if file_name not in durations:
+            try:
+                durations[file_name] = get_duration(os.path.join(audio_folder, file_name))
+            except Exception as e:
+                error = f"Cannot read duration: {e}"
+                print(f"{file_name}: {error}")
+                record({"file_name": file_name, "transcript": None, "time_taken": 0, "error": error})
+                return False
+        chunk_seconds, skip_reason = plan_clip(model_choice, durations[file_name], memory_limit_mb)
+        if skip_reason:
+            print(f"{file_name}: {skip_reason}")
+            record({"file_name": file_name, "transcript": None, "time_taken": 0, "error": skip_reason})
+            return False
+        return chunk_seconds
+
+    def create_executor():
+        if max_tasks_per_worker:
+            # Worker recycling is not supported with the fork start method
+            return ProcessPoolExecutor(
+                max_workers=parallel_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=max_tasks_per_worker,
+                initializer=init_worker,
+                initargs=(torch_threads, interop_threads),
             )
+        return ProcessPoolExecutor(
+            max_workers=parallel_processes,
+            initializer=init_worker,
+            initargs=(torch_threads, interop_threads),
+        )
+
+    # Use multiprocessing
+    # Files are submitted a few at a time, so the pool can be replaced when a worker
+    # grows too large or gets killed. Files in flight during a crash are retried
+    # afterwards one by one, which tells the culprit apart from its neighbours.
+    to_process = deque(audio_files)
+    to_retry = deque()
+    cancelled = False
+    rss_recycling = bool(max_worker_rss_mb)
+    while (to_process or to_retry) and not cancelled:
+        retrying = not to_process
+        source = to_retry if retrying else to_process
+        max_in_flight = 1 if retrying else parallel_processes * 2
+        restart_pool = False
+        with create_executor() as executor:
+            in_flight = {}
+            pool_results = 0
+            while True:
+                while source and len(in_flight) < max_in_flight and not (cancelled or restart_pool):
+                    file_name = source.popleft()
+                    chunk_seconds = plan(file_name)
+                    if chunk_seconds is False:
+                        continue
+                    full_path = os.path.join(audio_folder, file_name)
+                    try:
+                        future = executor.submit(
+                            transcribe_file, model_choice, full_path, file_name, model_options, chunk_seconds
+                        )
+                    except BrokenProcessPool:
+                        source.appendleft(file_name)
+                        restart_pool = True
+                        break
+                    in_flight[future] = file_name
+                if not in_flight:
+                    break
+
+                # Poll with a timeout so a cancel request is noticed even while long files run
+                done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_name = in_flight.pop(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        result_entry = future.result()
+                    except BrokenProcessPool:
+                        restart_pool = True
+                        if retrying:
+                            print(f"{file_name}: worker process died, probably out of memory")
+                            record({
+                                "file_name": file_name,
+                                "transcript": None,
+                                "time_taken": 0,
+                                "error": "Worker process died (out of memory?)",
+                            })
+                        else:
+                            to_retry.append(file_name)
+                        continue
+                    if retrying:
+                        result_entry["retried"] = True
+                    record(result_entry)
+                    pool_results += 1
+                    worker_rss_mb = result_entry.get("worker_rss_mb")
+                    if rss_recycling and worker_rss_mb and worker_rss_mb > max_worker_rss_mb and not restart_pool:
+                        if pool_results == 1:
+                            # A fresh worker is already over the limit after loading the model,
+                            # restarting would only reload the model after every file
+                            print(
+                                f"Warning: a new worker uses {worker_rss_mb:.0f} MB after its first file, above "
+                                f"--max-worker-rss {max_worker_rss_mb:.0f} MB. Disabling memory-based restarts."
+                            )
+                            rss_recycling = False
+                        else:
+                            print(f"Worker uses {worker_rss_mb:.0f} MB, restarting worker processes")
+                            restart_pool = True
+
+                if cancel_event is not None and cancel_event.is_set() and not cancelled:
+                    cancelled = True
+                    # Files already running in a worker cannot be interrupted, let them finish
+                    for future in in_flight:
+                        future.cancel()
+                    print("Cancelling: waiting for files already in progress to finish...")
+
+        if restart_pool and (to_process or to_retry) and not cancelled:
+            print("Starting new worker processes...")
 
     total_time_taken = time.time() - total_time_start
     with open(output_dir, "r+", encoding="utf-8") as json_file:
         data = json.load(json_file)
         data["total_time_taken"] = total_time_taken
+        if max_worker_rss_mb and not rss_recycling:
+            data["max_worker_rss_disabled"] = True
+        # Record what the workers actually used, setting inter-op threads can fail silently
+        if len(applied_threads) == 1:
+            data["torch_threads"], data["interop_threads"] = next(iter(applied_threads))
+        elif applied_threads:
+            data["torch_threads"] = sorted({threads[0] for threads in applied_threads})
+            data["interop_threads"] = sorted({threads[1] for threads in applied_threads})
+        if cancelled:
+            data["cancelled"] = True
         json_file.seek(0)
         json.dump(data, json_file, ensure_ascii=False, indent=4)
         json_file.truncate()
 
-    print(f"Done! Total time taken: {total_time_taken:.2f} seconds")
+    if cancelled:
+        print(f"Cancelled after {idx}/{folder_size} files, {total_time_taken:.2f} seconds")
+    else:
+        print(f"Done! Total time taken: {total_time_taken:.2f} seconds")
     print(f"Results saved to: {output_dir}")
     return output_dir
 
@@ -163,11 +460,104 @@ def start_gui():
     if not GUI_AVAILABLE:
         print("Error: tkinter is not available. Please use CLI mode or install tkinter.")
         return
+
+    # The job runs on a background thread, results come back through this queue
+    executor = ThreadPoolExecutor(max_workers=1)
+    progress_queue = queue.Queue()
+    job = {
+        "future": None,
+        "cancel_event": None,
+        "start_time": None,
+        "references": None,
+        "wer_scores": [],
+        "closing": False,
+    }
     
     def select_folder():
         new_path = filedialog.askdirectory()
         if new_path:
             folder_path.set(new_path)
+
+    def select_reference():
+        new_path = filedialog.askopenfilename(filetypes=[("TSV files", "*.tsv"), ("All files", "*.*")])
+        if not new_path:
+            return
+        try:
+            import evaluation  # noqa: F401, running WER needs jiwer
+            job["references"] = load_references(new_path)
+        except ImportError as e:
+            result_text.set(f"Cannot compute WER: {e}")
+            return
+        except (OSError, KeyError, UnicodeDecodeError) as e:
+            job["references"] = None
+            reference_path.set("")
+            result_text.set(f"Cannot read reference TSV (needs 'path' and 'sentence' columns): {e}")
+            return
+        reference_path.set(new_path)
+
+    def running_wer(result_entry):
+        references = job["references"]
+        if not references or result_entry["transcript"] is None:
+            return
+        sentence = references.get(result_entry["file_name"].replace(".wav", ".mp3"))
+        if sentence is None:
+            return
+        from evaluation import normalize_text, wer
+        job["wer_scores"].append(wer(normalize_text(sentence), normalize_text(result_entry["transcript"])))
+
+    def on_progress(result_entry, done, total):
+        # Called from the worker thread, tkinter must only be touched from the main loop
+        progress_queue.put(("progress", result_entry, done, total))
+
+    def run_job(audio_folder, model_choice, parallel_processes, cancel_event):
+        try:
+            output_file = transcribe(
+                audio_folder, model_choice, parallel_processes,
+                progress_callback=on_progress, cancel_event=cancel_event,
+            )
+            progress_queue.put(("finished", output_file))
+        except Exception as e:
+            progress_queue.put(("error", e))
+
+    def poll_queue():
+        try:
+            while True:
+                message = progress_queue.get_nowait()
+                kind = message[0]
+                if kind == "progress":
+                    _, result_entry, done, total = message
+                    running_wer(result_entry)
+                    progress_bar.config(maximum=total, value=done)
+                    elapsed = time.time() - job["start_time"]
+                    rate = done / elapsed if elapsed > 0 else 0.0
+                    eta = (total - done) / rate if rate > 0 else 0.0
+                    status = f"{done}/{total} files, {rate:.2f} files/s, ETA {eta:.0f}s"
+                    if job["wer_scores"]:
+                        status += f", WER {sum(job['wer_scores']) / len(job['wer_scores']):.2%}"
+                    progress_text.set(status)
+                elif kind == "finished":
+                    output_file = message[1]
+                    if output_file is None:
+                        result_text.set("Nothing to process, see console output.")
+                    elif job["cancel_event"].is_set():
+                        result_text.set(f"Cancelled. Partial results saved to: {output_file}")
+                    else:
+                        result_text.set(f"Done! Results saved to: {output_file}")
+                    finish_job()
+                elif kind == "error":
+                    result_text.set(f"Error: {str(message[1])}")
+                    finish_job()
+        except queue.Empty:
+            pass
+        if job["future"] is not None:
+            root.after(100, poll_queue)
+        elif job["closing"]:
+            close_window()
+
+    def finish_job():
+        job["future"] = None
+        transcribe_button.config(state="normal")
+        cancel_button.config(state="disabled")
     
     def transcribe_gui():
         audio_folder = folder_path.get()
@@ -179,21 +569,49 @@ def start_gui():
         parallel_processes = process_var.get()
         
         result_text.set("Processing...")
-        root.update()
-        
-        try:
-            output_file = transcribe(audio_folder, model_choice, parallel_processes)
-            result_text.set(f"Done! Results saved to: {output_file}")
-        except Exception as e:
-            result_text.set(f"Error: {str(e)}")
+        progress_text.set("")
+        progress_bar.config(value=0)
+        transcribe_button.config(state="disabled")
+        cancel_button.config(state="normal")
+
+        job["cancel_event"] = threading.Event()
+        job["start_time"] = time.time()
+        job["wer_scores"] = []
+        job["future"] = executor.submit(
+            run_job, audio_folder, model_choice, parallel_processes, job["cancel_event"]
+        )
+        root.after(100, poll_queue)
+
+    def cancel_gui():
+        if job["future"] is not None:
+            job["cancel_event"].set()
+            cancel_button.config(state="disabled")
+            result_text.set("Cancelling, waiting for files in progress...")
+
+    def on_close():
+        if job["future"] is None:
+            close_window()
+            return
+        # Files already running in a worker cannot be interrupted, keep the window until they finish
+        job["closing"] = True
+        job["cancel_event"].set()
+        cancel_button.config(state="disabled")
+        result_text.set("Closing: finishing files in progress, the window closes when done...")
+
+    def close_window():
+        executor.shutdown(wait=False)
+        root.destroy()
     
     root = tk.Tk()
     root.title("Speech Recognition GUI")
-    root.geometry("400x450")
+    root.geometry("400x600")
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     folder_path = tk.StringVar()
+    reference_path = tk.StringVar()
     model_var = tk.StringVar(value="Google")
     result_text = tk.StringVar()
+    progress_text = tk.StringVar()
     padding_x = 25
 
     # File selection button
@@ -205,6 +623,15 @@ def start_gui():
     folder_label.pack(pady=5)
     folder_label.config(width=50)
 
+    # Optional reference TSV for running WER
+    reference_button = tk.Button(root, text="Select Reference TSV", command=select_reference)
+    reference_button.pack(pady=5)
+    reference_button.config(width=int(padding_x/2) + 6)
+
+    reference_label = tk.Label(root, textvariable=reference_path, wraplength=500)
+    reference_label.pack(pady=5)
+    reference_label.config(width=50)
+
     # Model selection
     model_frame = tk.LabelFrame(root, text="Select Model")
     model_frame.pack(pady=10)
@@ -231,10 +658,24 @@ def start_gui():
         label="Processes",
     ).pack()
     
-    # Transcribe button
-    transcribe_button = tk.Button(root, text="Transcribe", command=transcribe_gui)
-    transcribe_button.pack(pady=10)
+    # Transcribe and cancel buttons
+    button_frame = tk.Frame(root)
+    button_frame.pack(pady=10)
+
+    transcribe_button = tk.Button(button_frame, text="Transcribe", command=transcribe_gui)
+    transcribe_button.pack(side="left", padx=5)
     transcribe_button.config(width=int(padding_x/2))
+
+    cancel_button = tk.Button(button_frame, text="Cancel", command=cancel_gui, state="disabled")
+    cancel_button.pack(side="left", padx=5)
+    cancel_button.config(width=int(padding_x/2))
+
+    # Progress
+    progress_bar = ttk.Progressbar(root, orient="horizontal", length=300, mode="determinate")
+    progress_bar.pack(pady=5)
+
+    progress_label = tk.Label(root, textvariable=progress_text, wraplength=350)
+    progress_label.pack(pady=5)
     
     # Result label
     result_label = tk.Label(root, textvariable=result_text, wraplength=350, fg="blue")
@@ -248,7 +689,14 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         # CLI mode
         parser = argparse.ArgumentParser(description="Transcribe audio files using various speech recognition models")
-        parser.add_argument("--folder", "-f", type=str, required=True, help="Path to folder containing audio files")
+        parser.add_argument(
+            "--folder", "-f", type=str,
+            help="Path to folder containing audio files; with --manifest, the corpus root on this machine"
+        )
+        parser.add_argument(
+            "--manifest", type=str,
+            help="Manifest JSON built by manifest.py (corpus root taken from it unless --folder is given)"
+        )
         parser.add_argument(
             "--model", "-m", type=str, required=True,
             choices=["Google", "Whisper", "Sphinx", "Whisper_openai", "Wav2Vec_base", "Wav2Vec_large"],
@@ -258,9 +706,106 @@ if __name__ == "__main__":
             "--processes", "-p", type=int, default=1,
             help="Number of parallel processes (default: 1)"
         )
+        parser.add_argument("--sphinx-lm", type=str, help="Sphinx: custom n-gram language model")
+        parser.add_argument("--sphinx-dict", type=str, help="Sphinx: custom pronunciation dictionary")
+        sphinx_search = parser.add_mutually_exclusive_group()
+        sphinx_search.add_argument("--sphinx-kws", type=str, help="Sphinx: keyword list used instead of the language model")
+        sphinx_search.add_argument("--sphinx-jsgf", type=str, help="Sphinx: JSGF grammar used instead of the language model")
+        parser.add_argument(
+            "--word-details", action="store_true",
+            help="Wav2Vec: store per-word timings and confidences in the output"
+        )
+        parser.add_argument("--lm", type=str, help="Wav2Vec: KenLM n-gram file, uses beam search instead of greedy decoding")
+        parser.add_argument("--beam-width", type=int, help="Wav2Vec: beam width for beam search (default: 100)")
+        parser.add_argument(
+            "--model-store", type=str,
+            help="Whisper_openai/Wav2Vec: load weights offline from a store made by model_store.py "
+                 "(default: $ASR_MODEL_STORE)"
+        )
+        parser.add_argument(
+            "--torch-threads", type=int,
+            help="Intra-op torch threads per process (default: available cores / processes)"
+        )
+        parser.add_argument(
+            "--interop-threads", type=int,
+            help="Inter-op torch threads per process (default: 1)"
+        )
+        parser.add_argument(
+            "--max-tasks-per-worker", type=int,
+            help="Replace each worker process after this many files"
+        )
+        parser.add_argument(
+            "--max-worker-rss", type=float,
+            help="Restart the worker processes once one uses more than this many MB"
+        )
+        parser.add_argument(
+            "--max-clip-memory", type=float,
+            help="Per-clip memory budget in MB, longer clips are chunked or skipped (default: --max-worker-rss)"
+        )
+        parser.add_argument("--shard", type=str, help="Manifest only: process shard i of N (1-based), e.g. 2/4")
+        parser.add_argument("--max-duration", type=float, help="Manifest only: skip files longer than this (seconds)")
+        parser.add_argument("--min-duration", type=float, help="Manifest only: skip files shorter than this (seconds)")
         
         args = parser.parse_args()
-        transcribe(args.folder, args.model, args.processes)
+        model_options = {
+            name: value
+            for name, value in {
+                "sphinx_lm": args.sphinx_lm,
+                "sphinx_dict": args.sphinx_dict,
+                "sphinx_kws": args.sphinx_kws,
+                "sphinx_jsgf": args.sphinx_jsgf,
+                "word_details": args.word_details,
+                "lm_path": args.lm,
+                "beam_width": args.beam_width,
+                "model_store": args.model_store,
+            }.items()
+            if value
+        }
+        memory_limits = {
+            "max_tasks_per_worker": args.max_tasks_per_worker,
+            "max_worker_rss_mb": args.max_worker_rss,
+            "max_clip_memory_mb": args.max_clip_memory,
+        }
+        thread_options = {
+            "torch_threads": args.torch_threads,
+            "interop_threads": args.interop_threads,
+        }
+        if not args.model.startswith("Wav2Vec") and (args.word_details or args.lm or args.beam_width):
+            parser.error("--word-details, --lm and --beam-width are only supported by Wav2Vec models")
+        if args.model != "Sphinx" and (args.sphinx_lm or args.sphinx_dict or args.sphinx_kws or args.sphinx_jsgf):
+            parser.error("--sphinx-* options are only supported by the Sphinx model")
+        if args.sphinx_lm and (args.sphinx_kws or args.sphinx_jsgf):
+            parser.error("--sphinx-lm cannot be combined with --sphinx-kws or --sphinx-jsgf, they replace the language model")
+        if not args.folder and not args.manifest:
+            parser.error("one of --folder or --manifest is required")
+        if args.manifest:
+            manifest = load_manifest(args.manifest)
+            # The corpus may be mounted elsewhere than on the machine that built the manifest
+            corpus = args.folder or manifest["corpus"]
+            entries = filter_entries(manifest["entries"], max_duration=args.max_duration, min_duration=args.min_duration)
+            run_info = {
+                "manifest": os.path.abspath(args.manifest),
+                "max_duration": args.max_duration,
+                "min_duration": args.min_duration,
+            }
+            if args.shard:
+                try:
+                    shard_index, shard_count = parse_shard(args.shard)
+                except ValueError as e:
+                    parser.error(str(e))
+                entries = shard_entries(entries, shard_index, shard_count)
+                run_info["shard"] = f"{shard_index}/{shard_count}"
+            run_info["audio_duration"] = sum(entry["duration"] for entry in entries)
+            print(f"Manifest: {len(entries)} files, {run_info['audio_duration']:.1f}s of audio")
+            transcribe(
+                corpus, args.model, args.processes, model_options=model_options,
+                audio_files=[entry["path"] for entry in entries], run_info=run_info,
+                durations={entry["path"]: entry["duration"] for entry in entries}, **memory_limits, **thread_options,
+            )
+        else:
+            if args.shard or args.max_duration is not None or args.min_duration is not None:
+                parser.error("--shard, --max-duration and --min-duration require --manifest")
+            transcribe(args.folder, args.model, args.processes, model_options=model_options, **memory_limits, **thread_options)
     else:
         # GUI mode
         start_gui()
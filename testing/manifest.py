@@ -0,0 +1,202 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import librosa
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac")
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the SHA-1 of the file content, read in chunks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as infile:
+        for chunk in iter(lambda: infile.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_references(tsv_path: str) -> dict:
+    """Maps each clip path in validated.tsv to its reference sentence."""
+    with open(tsv_path, "r", encoding="utf-8") as infile:
+        reader = csv.DictReader(infile, delimiter="\t")
+        return {row["path"].strip(): row["sentence"] for row in reader}
+
+
+def build_manifest(audio_folder: str, tsv_path: str = None) -> dict:
+    """
+    Scans the corpus once and indexes every audio file.
+
+    Args:
+        audio_folder: Path to folder containing audio files
+        tsv_path: Optional validated.tsv used to attach reference sentences
+    """
+    references = load_references(tsv_path) if tsv_path else {}
+    audio_files = sorted(
+        file_name
+        for file_name in os.listdir(audio_folder)
+        if file_name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+
+    entries = []
+    for idx, file_name in enumerate(audio_files, 1):
+        full_path = os.path.join(audio_folder, file_name)
+        # validated.tsv lists the original mp3 names
+        mp3_file_name = os.path.splitext(file_name)[0] + ".mp3"
+        entries.append({
+            "path": file_name,
+            "size": os.path.getsize(full_path),
+            "duration": librosa.get_duration(path=full_path),
+            "sample_rate": librosa.get_samplerate(full_path),
+            "sha1": file_hash(full_path),
+            "sentence": references.get(file_name, references.get(mp3_file_name)),
+        })
+        print(f"({idx}/{len(audio_files)}) Indexed: {file_name}")
+
+    return {
+        "corpus": os.path.abspath(audio_folder),
+        "reference_tsv": os.path.abspath(tsv_path) if tsv_path else None,
+        "total_duration": sum(entry["duration"] for entry in entries),
+        "entries": entries,
+    }
+
+
+def load_manifest(manifest_path: str) -> dict:
+    with open(manifest_path, "r", encoding="utf-8") as infile:
+        return json.load(infile)
+
+
+def filter_entries(entries: list, max_duration: float = None, min_duration: float = None) -> list:
+    """Keeps only the entries within the duration bounds (seconds)."""
+    filtered = []
+    for entry in entries:
+        if max_duration is not None and entry["duration"] > max_duration:
+            continue
+        if min_duration is not None and entry["duration"] < min_duration:
+            continue
+        filtered.append(entry)
+    return filtered
+
+
+def parse_shard(shard: str) -> tuple:
+    """Parses 'i/N' (1-based) into (i, N)."""
+    try:
+        shard_index, shard_count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{shard}', expected i/N, e.g. 1/4.")
+    if shard_count < 1 or not 1 <= shard_index <= shard_count:
+        raise ValueError(f"Invalid shard '{shard}', i must be between 1 and N.")
+    return shard_index, shard_count
+
+
+def shard_entries(entries: list, shard_index: int, shard_count: int) -> list:
+    """
+    Splits the entries into shards of roughly equal total duration and returns one of them.
+    Longest files are assigned first, each to the currently shortest shard, so every
+    machine gets the same split for the same manifest.
+    """
+    shard_durations = [0.0] * shard_count
+    shards = [[] for _ in range(shard_count)]
+    for entry in sorted(entries, key=lambda entry: (-entry["duration"], entry["path"])):
+        target = shard_durations.index(min(shard_durations))
+        shards[target].append(entry)
+        shard_durations[target] += entry["duration"]
+    return sorted(shards[shard_index - 1], key=lambda entry: entry["path"])
+
+
+# Header fields describing the machine and run of one shard, kept per shard when merging
+SHARD_FIELDS = (
+    "shard",
+    "total_time_taken",
+    "audio_duration",
+    "cancelled",
+    "available_cores",
+    "requested_torch_threads",
+    "requested_interop_threads",
+    "torch_threads",
+    "interop_threads",
+)
+
+
+def model_config(model_options: dict) -> dict:
+    """Model options that affect the transcripts; the store location may differ between machines."""
+    return {key: value for key, value in (model_options or {}).items() if key != "model_store"}
+
+
+def merge_outputs(output_paths: list, merged_path: str) -> dict:
+    """Merges the output JSON files of several shards into one run."""
+    merged = None
+    seen_files = set()
+    for output_path in output_paths:
+        with open(output_path, "r", encoding="utf-8") as infile:
+            data = json.load(infile)
+        if merged is None:
+            merged = {
+                key: value
+                for key, value in data.items()
+                if key not in ("results",) + SHARD_FIELDS
+            }
+            merged["model_options"] = model_config(data.get("model_options"))
+            merged["shards"] = []
+            merged["results"] = []
+        elif data.get("model") != merged.get("model"):
+            raise ValueError(f"{output_path} was produced by {data.get('model')}, expected {merged.get('model')}.")
+        elif model_config(data.get("model_options")) != merged["model_options"]:
+            raise ValueError(
+                f"{output_path} was run with model options {model_config(data.get('model_options'))}, "
+                f"expected {merged['model_options']}."
+            )
+
+        shard_info = {"output": os.path.basename(output_path)}
+        shard_info.update({field: data.get(field) for field in SHARD_FIELDS})
+        shard_info["cancelled"] = bool(shard_info["cancelled"])
+        shard_info["model_store"] = (data.get("model_options") or {}).get("model_store")
+        merged["shards"].append(shard_info)
+        for result in data.get("results", []):
+            if result["file_name"] in seen_files:
+                print(f"Duplicate result skipped: {result['file_name']} in {output_path}")
+                continue
+            seen_files.add(result["file_name"])
+            merged["results"].append(result)
+
+    if merged is None:
+        raise ValueError("No output files to merge.")
+
+    # Shards run side by side, the slowest one determines the wall time
+    shard_times = [shard["total_time_taken"] for shard in merged["shards"] if shard["total_time_taken"] is not None]
+    merged["total_time_taken"] = max(shard_times) if shard_times else None
+    shard_durations = [shard["audio_duration"] for shard in merged["shards"] if shard["audio_duration"] is not None]
+    merged["audio_duration"] = sum(shard_durations) if shard_durations else None
+    if any(shard["cancelled"] for shard in merged["shards"]):
+        merged["cancelled"] = True
+
+    with open(merged_path, "w", encoding="utf-8") as outfile:
+        json.dump(merged, outfile, ensure_ascii=False, indent=4)
+    return merged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build dataset manifests and merge sharded runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Scan a corpus and write a manifest")
+    build_parser.add_argument("--folder", "-f", type=str, required=True, help="Path to folder containing audio files")
+    build_parser.add_argument("--tsv", type=str, help="validated.tsv with reference sentences")
+    build_parser.add_argument("--output", "-o", type=str, required=True, help="Path of the manifest JSON to write")
+
+    merge_parser = subparsers.add_parser("merge", help="Merge output JSON files of sharded runs")
+    merge_parser.add_argument("outputs", nargs="+", help="Output JSON files of the shards")
+    merge_parser.add_argument("--output", "-o", type=str, required=True, help="Path of the merged output JSON")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        manifest = build_manifest(args.folder, args.tsv)
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            json.dump(manifest, outfile, ensure_ascii=False, indent=4)
+        print(f"Indexed {len(manifest['entries'])} files ({manifest['total_duration']:.1f}s of audio)")
+        print(f"Manifest saved to: {args.output}")
+    else:
+        merged = merge_outputs(args.outputs, args.output)
+        print(f"Merged {len(merged['results'])} results from {len(merged['shards'])} shards")
+        print(f"Results saved to: {args.output}")
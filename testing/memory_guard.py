@@ -0,0 +1,79 @@
+import os
+import librosa
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Rough memory model per clip: base (weights + runtime) + linear term + quadratic term (self-attention)
+# Values in MB, duration in seconds. Estimated from float32 parameter counts and attention sizes,
+# not measured; adjust after observing worker_rss_mb in real runs.
+MODEL_MEMORY_MB = {
+    "Google": (150, 0.1, 0.0),
+    "Whisper": (900, 0.1, 0.0),
+    "Sphinx": (150, 0.1, 0.0),
+    "Whisper_openai": (3400, 0.1, 0.0),  # decodes in fixed 30 s windows
+    "Wav2Vec_base": (700, 8.0, 0.12),
+    "Wav2Vec_large": (1800, 15.0, 0.16),
+}
+
+# Models whose transcribe() accepts chunk_seconds
+CHUNKABLE_MODELS = ("Wav2Vec_base", "Wav2Vec_large")
+
+# Chunks shorter than this lose too much context to be worth it
+MIN_CHUNK_SECONDS = 5.0
+
+
+def get_rss_mb() -> float:
+    """Returns the resident memory of the current process in MB, or None if it cannot be read."""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_duration(path: str) -> float:
+    return librosa.get_duration(path=path)
+
+
+def estimate_clip_memory_mb(model_choice: str, duration: float) -> float:
+    base, per_second, per_second_squared = MODEL_MEMORY_MB[model_choice]
+    return base + per_second * duration + per_second_squared * duration ** 2
+
+
+def max_chunk_seconds(model_choice: str, memory_limit_mb: float) -> float:
+    """Longest clip duration whose estimate stays within the limit, or None if even the model does not fit."""
+    base, per_second, per_second_squared = MODEL_MEMORY_MB[model_choice]
+    budget = memory_limit_mb - base
+    if budget <= 0:
+        return None
+    if per_second_squared == 0:
+        return budget / per_second if per_second else float("inf")
+    # Solve per_second_squared * d^2 + per_second * d - budget = 0 for d
+    return (-per_second + (per_second ** 2 + 4 * per_second_squared * budget) ** 0.5) / (2 * per_second_squared)
+
+
+def plan_clip(model_choice: str, duration: float, memory_limit_mb: float) -> tuple:
+    """
+    Decides how to process a clip under the memory limit.
+
+    Returns:
+        (chunk_seconds, skip_reason): chunk_seconds is None when the clip fits as a whole,
+        skip_reason is set when the clip cannot be processed within the limit
+    """
+    estimate = estimate_clip_memory_mb(model_choice, duration)
+    if estimate <= memory_limit_mb:
+        return None, None
+
+    if model_choice in CHUNKABLE_MODELS:
+        chunk_seconds = max_chunk_seconds(model_choice, memory_limit_mb)
+        if chunk_seconds is not None and chunk_seconds >= MIN_CHUNK_SECONDS:
+            return chunk_seconds, None
+
+    return None, f"Skipped: estimated {estimate:.0f} MB exceeds the {memory_limit_mb:.0f} MB limit"
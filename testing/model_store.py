@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import time
+
+WAV2VEC_MODELS = {
+    "large": "facebook/wav2vec2-large-960h-lv60-self",
+    "base": "facebook/wav2vec2-base-960h",
+}
+WHISPER_MODEL = "turbo"
+
+# Directory names inside the store, one per exportable model choice
+STORE_ENTRIES = {
+    "Wav2Vec_large": "wav2vec2-large",
+    "Wav2Vec_base": "wav2vec2-base",
+    "Whisper_openai": f"whisper-{WHISPER_MODEL}",
+}
+
+
+def entry_path(model_store: str, model_choice: str) -> str:
+    return os.path.join(model_store, STORE_ENTRIES[model_choice])
+
+
+def export_wav2vec(model_variant: str, model_store: str) -> str:
+    from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+
+    target = entry_path(model_store, f"Wav2Vec_{model_variant}")
+    model_name = WAV2VEC_MODELS[model_variant]
+    Wav2Vec2Processor.from_pretrained(model_name).save_pretrained(target)
+    Wav2Vec2ForCTC.from_pretrained(model_name).save_pretrained(target, safe_serialization=True)
+    return target
+
+
+def export_whisper(model_store: str, dtype: str = "float32") -> str:
+    """
+    Args:
+        model_store: Store directory
+        dtype: 'float32' (loads on CPU without a cast) or 'float16' (half the size, for GPU nodes only;
+            CPU workers then cast to a private float32 copy each)
+    """
+    import torch
+    import whisper
+    from dataclasses import asdict
+    from safetensors.torch import save_file
+
+    target = entry_path(model_store, "Whisper_openai")
+    os.makedirs(target, exist_ok=True)
+    model = whisper.load_model(WHISPER_MODEL, device="cpu")
+    save_file(
+        {name: tensor.to(getattr(torch, dtype)).contiguous() for name, tensor in model.state_dict().items()},
+        os.path.join(target, "model.safetensors"),
+    )
+    with open(os.path.join(target, "config.json"), "w", encoding="utf-8") as config_file:
+        json.dump({
+            "name": WHISPER_MODEL,
+            "dtype": dtype,
+            "dims": asdict(model.dims),
+            # Needed for word timestamps, load_model() normally takes it from a table keyed by name
+            "alignment_heads": whisper._ALIGNMENT_HEADS[WHISPER_MODEL].decode("ascii"),
+        }, config_file, indent=4)
+    return target
+
+
+def load_wav2vec(model_variant: str, model_store: str) -> tuple:
+    """Returns (processor, model) from the store without touching the network."""
+    from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+
+    source = entry_path(model_store, f"Wav2Vec_{model_variant}")
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"{source} not found, run: python testing/model_store.py export --store {model_store}")
+    # A local directory with local_files_only never contacts the hub; safetensors are memory-mapped
+    processor = Wav2Vec2Processor.from_pretrained(source, local_files_only=True)
+    model = Wav2Vec2ForCTC.from_pretrained(source, local_files_only=True)
+    return processor, model
+
+
+def load_whisper(model_store: str, device: str = "cpu"):
+    """
+    Builds the model on the meta device (no random init) and assigns the safetensors tensors
+    as its parameters. On CPU a float32 store is used as is: the tensors stay backed by a
+    copy-on-write mapping of the file, so workers share its pages. A float16 store is cast
+    to float32 on CPU, which gives every worker its own copy of the weights.
+    """
+    import torch
+    from safetensors.torch import load_file
+    from whisper.model import ModelDimensions, Whisper
+
+    source = entry_path(model_store, "Whisper_openai")
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"{source} not found, run: python testing/model_store.py export --store {model_store}")
+    with open(os.path.join(source, "config.json"), "r", encoding="utf-8") as config_file:
+        config = json.load(config_file)
+
+    dims = ModelDimensions(**config["dims"])
+    with torch.device("meta"):
+        model = Whisper(dims)
+    model.load_state_dict(load_file(os.path.join(source, "model.safetensors")), assign=True)
+    # Non-persistent buffers are not in the file and would stay on the meta device
+    model.decoder.register_buffer(
+        "mask", torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-float("inf")).triu_(1), persistent=False
+    )
+    model.set_alignment_heads(config["alignment_heads"].encode("ascii"))
+    # Stores exported before the dtype option were float16
+    if device == "cpu" and config.get("dtype", "float16") != "float32":
+        # Whisper runs float32 on CPU, float16 weights would be cast on every forward pass
+        model = model.float()
+    return model.to(device)
+
+
+def load_from_hub(model_choice: str):
+    """Loads the model the way the wrappers do without a store, for comparing load times."""
+    if model_choice == "Whisper_openai":
+        import whisper
+        return whisper.load_model(WHISPER_MODEL, device="cpu")
+    from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+    model_name = WAV2VEC_MODELS[model_choice.split("_")[1]]
+    return Wav2Vec2Processor.from_pretrained(model_name), Wav2Vec2ForCTC.from_pretrained(model_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefetch models into a local store for offline workers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Download models and save them in the store")
+    export_parser.add_argument("--store", "-s", type=str, required=True, help="Model store directory")
+    export_parser.add_argument(
+        "--models", "-m", nargs="+", choices=list(STORE_ENTRIES), default=list(STORE_ENTRIES),
+        help="Models to export (default: all)"
+    )
+    export_parser.add_argument(
+        "--dtype", choices=["float32", "float16"], default="float32",
+        help="Whisper_openai weight type; float16 halves the store but CPU workers then copy the weights "
+             "(default: float32)"
+    )
+
+    check_parser = subparsers.add_parser("check", help="Load models from the store offline and time it")
+    check_parser.add_argument("--store", "-s", type=str, required=True, help="Model store directory")
+    check_parser.add_argument(
+        "--models", "-m", nargs="+", choices=list(STORE_ENTRIES), default=list(STORE_ENTRIES),
+        help="Models to load (default: all)"
+    )
+    check_parser.add_argument(
+        "--compare-hub", action="store_true",
+        help="Also time loading through the hub/download cache, as without a store"
+    )
+
+    args = parser.parse_args()
+    if args.command == "export":
+        os.makedirs(args.store, exist_ok=True)
+    for model_choice in args.models:
+        start_time = time.time()
+        if args.command == "export":
+            if model_choice == "Whisper_openai":
+                target = export_whisper(args.store, args.dtype)
+            else:
+                target = export_wav2vec(model_choice.split("_")[1], args.store)
+            print(f"{model_choice} exported to {target} in {time.time() - start_time:.2f}s")
+        else:
+            if model_choice == "Whisper_openai":
+                load_whisper(args.store)
+            else:
+                load_wav2vec(model_choice.split("_")[1], args.store)
+            print(f"{model_choice} loaded in {time.time() - start_time:.2f}s")
+            if args.compare_hub:
+                start_time = time.time()
+                load_from_hub(model_choice)
+                print(f"{model_choice} loaded from hub cache in {time.time() - start_time:.2f}s")
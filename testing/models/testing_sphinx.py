@@ -0,0 +1,58 @@
+import librosa
+import numpy as np
+from pocketsphinx import Decoder
+
+
+class SphinxModel:
+    def __init__(self, lm: str = None, dictionary: str = None, kws: str = None, jsgf: str = None):
+        """
+        Keeps one PocketSphinx decoder alive for every transcription.
+
+        Args:
+            lm: Path to a custom n-gram language model (.lm / .lm.bin)
+            dictionary: Path to a custom pronunciation dictionary (.dict)
+            kws: Path to a keyword list, replaces the language model
+            jsgf: Path to a JSGF grammar, replaces the language model
+        """
+        if kws and jsgf:
+            raise ValueError("Use either a keyword list or a JSGF grammar, not both.")
+        if lm and (kws or jsgf):
+            raise ValueError("A keyword list or JSGF grammar replaces the language model, do not pass both.")
+
+        config = {}
+        if lm:
+            config["lm"] = lm
+        if dictionary:
+            config["dict"] = dictionary
+        if kws or jsgf:
+            # Search modes are exclusive, the default language model has to be disabled
+            config["lm"] = None
+            if kws:
+                config["kws"] = kws
+            else:
+                config["jsgf"] = jsgf
+
+        self.decoder = Decoder(samprate=16000, **config)
+        print(f"Using model: sphinx ({', '.join(config) or 'default'})")
+
+    def transcribe(self, file: str) -> str:
+        # Check if file exists
+        try:
+            with open(file):
+                pass
+        except FileNotFoundError:
+            return None
+
+        input_audio, _ = librosa.load(file, sr=16000)
+        pcm = (np.clip(input_audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+        self.decoder.start_utt()
+        self.decoder.process_raw(pcm, full_utt=True)
+        self.decoder.end_utt()
+
+        hypothesis = self.decoder.hyp()
+        if hypothesis is None:
+            return None
+        text: str = hypothesis.hypstr.lower()
+
+        return text
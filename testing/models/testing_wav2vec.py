@@ -1,23 +1,77 @@
 import librosa
 import torch
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+from model_store import WAV2VEC_MODELS, load_wav2vec
 import logging
 
+try:
+    from pyctcdecode import build_ctcdecoder
+    BEAM_SEARCH_AVAILABLE = True
+except ImportError:
+    BEAM_SEARCH_AVAILABLE = False
+
 
 class Wav2Vec2Model:
-    def __init__(self, model_variant: str = "large"):
+    def __init__(self, model_variant: str = "large", lm_path: str = None, beam_width: int = None, model_store: str = None):
+        """
+        Args:
+            model_variant: 'large' or 'base'
+            lm_path: Optional KenLM n-gram file (.arpa / .bin), switches from greedy argmax to beam search
+            beam_width: Beam width for beam search (default: 100, pyctcdecode default)
+            model_store: Optional local store from model_store.py, loads offline instead of from the hub
+        """
         logging.getLogger("torch").setLevel(logging.ERROR)
-        if model_variant == "large":
-            model_name = "facebook/wav2vec2-large-960h-lv60-self"
-        elif model_variant == "base":
-            model_name = "facebook/wav2vec2-base-960h"
-        else:
+        if model_variant not in WAV2VEC_MODELS:
             raise ValueError("Unknown model variant. Use 'large' or 'base'.")
 
-        self.processor = Wav2Vec2Processor.from_pretrained(model_name)
-        self.model = Wav2Vec2ForCTC.from_pretrained(model_name)
+        if model_store:
+            self.processor, self.model = load_wav2vec(model_variant, model_store)
+        else:
+            model_name = WAV2VEC_MODELS[model_variant]
+            self.processor = Wav2Vec2Processor.from_pretrained(model_name)
+            self.model = Wav2Vec2ForCTC.from_pretrained(model_name)
+
+        tokenizer = self.processor.tokenizer
+        self.blank_id = tokenizer.pad_token_id
+        self.delimiter_id = tokenizer.convert_tokens_to_ids(tokenizer.word_delimiter_token)
+        self.id_to_token = {token_id: token for token, token_id in tokenizer.get_vocab().items()}
+
+        self.beam_width = beam_width or 100
+        self.beam_decoder = None
+        if lm_path or beam_width:
+            if not BEAM_SEARCH_AVAILABLE:
+                raise ImportError("Beam search needs pyctcdecode (and kenlm for an LM): pip install pyctcdecode kenlm")
+            # pyctcdecode expects "" for the CTC blank and " " for the word delimiter
+            labels = []
+            for token_id in range(len(self.id_to_token)):
+                if token_id == self.blank_id:
+                    labels.append("")
+                elif token_id == self.delimiter_id:
+                    labels.append(" ")
+                else:
+                    labels.append(self.id_to_token[token_id])
+            self.beam_decoder = build_ctcdecoder(labels, kenlm_model_path=lm_path)
 
-    def transcribe(self, file: str) -> str:
+    def transcribe(self, file: str, chunk_seconds: float = None) -> str:
+        """
+        Args:
+            file: Path to the audio file
+            chunk_seconds: Optional chunk length; long clips are split to bound memory use,
+                words cut at chunk borders may be misrecognized
+        """
+        details = self.transcribe_detailed(file, chunk_seconds)
+        if details is None:
+            return None
+        return details["text"]
+
+    def transcribe_detailed(self, file: str, chunk_seconds: float = None) -> dict:
+        """
+        Transcribes the file and keeps word timings and CTC confidences from the same forward pass.
+
+        Returns:
+            {"text": str, "confidence": float, "words": [[word, start_s, end_s, confidence], ...]}
+            confidence is the mean posterior of the frames emitting the word's characters
+        """
         # Check if file exists
         try:
             with open(file):
@@ -26,10 +80,87 @@ class Wav2Vec2Model:
             return None
 
         input_audio, _ = librosa.load(file, sr=16000)
-        input_values = self.processor(input_audio, sampling_rate=16000, return_tensors="pt").input_values
-        logits = self.model(input_values).logits
-        predicted_ids = torch.argmax(logits, dim=-1)
-        text: str = self.processor.batch_decode(predicted_ids)[0]
+        words = []
+        for offset, chunk in self._split(input_audio, chunk_seconds):
+            words.extend(self._decode_chunk(chunk, offset))
+
+        text: str = " ".join(word[0] for word in words)
         text = text.lower()
+        confidence = sum(word[3] for word in words) / len(words) if words else 0.0
+
+        return {
+            "text": text,
+            "confidence": round(confidence, 4),
+            "words": [[word.lower(), round(start, 2), round(end, 2), round(conf, 3)] for word, start, end, conf in words],
+        }
+
+    def _split(self, input_audio, chunk_seconds: float = None) -> list:
+        """Returns (offset in seconds, samples) pairs."""
+        if not chunk_seconds:
+            return [(0.0, input_audio)]
+        chunk_size = int(chunk_seconds * 16000)
+        starts = list(range(0, len(input_audio), chunk_size))
+        # Merge a short tail into the previous chunk
+        if len(starts) > 1 and len(input_audio) - starts[-1] < 16000:
+            starts.pop()
+        ends = starts[1:] + [len(input_audio)]
+        return [(start / 16000, input_audio[start:end]) for start, end in zip(starts, ends)]
+
+    def _decode_chunk(self, input_audio, offset: float) -> list:
+        input_values = self.processor(input_audio, sampling_rate=16000, return_tensors="pt").input_values
+        # No autograd graph, otherwise activations are kept alive and memory grows with clip length
+        with torch.inference_mode():
+            logits = self.model(input_values).logits
+        log_probs = torch.log_softmax(logits[0], dim=-1)
+        frame_probs, frame_ids = log_probs.max(dim=-1)
+        frame_probs = frame_probs.exp().tolist()
+        frame_ids = frame_ids.tolist()
+        frame_seconds = len(input_audio) / 16000 / log_probs.shape[0]
+
+        if self.beam_decoder is not None:
+            text, _, word_frames, _, _ = self.beam_decoder.decode_beams(
+                log_probs.numpy(), beam_width=self.beam_width
+            )[0]
+            words = []
+            for word, (start_frame, end_frame) in word_frames:
+                # Same as greedy: only frames emitting characters, blanks are usually near-certain
+                span = [
+                    prob
+                    for token_id, prob in zip(frame_ids[start_frame:end_frame], frame_probs[start_frame:end_frame])
+                    if token_id not in (self.blank_id, self.delimiter_id)
+                ] or [0.0]
+                words.append((word, offset + start_frame * frame_seconds, offset + end_frame * frame_seconds, sum(span) / len(span)))
+            return words
+
+        return self._greedy_words(frame_ids, frame_probs, frame_seconds, offset)
+
+    def _greedy_words(self, frame_ids: list, frame_probs: list, frame_seconds: float, offset: float) -> list:
+        """Collapses the argmax path CTC-style and groups characters into timed words."""
+        words = []
+        characters, probs, start_frame, end_frame = [], [], None, None
+
+        def close_word():
+            if characters:
+                words.append((
+                    "".join(characters),
+                    offset + start_frame * frame_seconds,
+                    offset + (end_frame + 1) * frame_seconds,
+                    sum(probs) / len(probs),
+                ))
+
+        previous_id = None
+        for frame, (token_id, prob) in enumerate(zip(frame_ids, frame_probs)):
+            if token_id == self.delimiter_id:
+                close_word()
+                characters, probs, start_frame = [], [], None
+            elif token_id != self.blank_id:
+                if token_id != previous_id:
+                    characters.append(self.id_to_token[token_id])
+                if start_frame is None:
+                    start_frame = frame
+                end_frame = frame
+                probs.append(prob)
+            previous_id = token_id
+        close_word()
 
-        return text
\ No newline at end of file
+        return words
@@ -1,13 +1,17 @@
 import whisper
 import torch
 import logging
+from model_store import WHISPER_MODEL, load_whisper
 
 
 class WhisperModel:
-    def __init__(self):
+    def __init__(self, model_store: str = None):
         device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"Using device: {device}")
-        self.model = whisper.load_model("turbo", device=device)
+        if model_store:
+            self.model = load_whisper(model_store, device=device)
+        else:
+            self.model = whisper.load_model(WHISPER_MODEL, device=device)
         logging.getLogger("torch").setLevel(logging.ERROR)
 
     def transcribe(self, file_name: str) -> str: